@@ -29,6 +29,10 @@ class Settings(BaseSettings):
     THRESHOLD_PRESSURE_MIN: float = 900
     THRESHOLD_PRESSURE_MAX: float = 1100
 
+    # Duplicate filtering (QoS 1 redelivery)
+    DEDUP_CACHE_SIZE: int = 100000
+    DEDUP_WINDOW_SECONDS: float = 600
+
     @property
     def mqtt_topics_list(self) -> List[str]:
         return [t.strip() for t in self.MQTT_TOPICS.split(",") if t.strip()]
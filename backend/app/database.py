@@ -2,7 +2,7 @@
 SQLAlchemy database engine, session, and base model configuration.
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
 
@@ -26,3 +26,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def ensure_dedup_key_column(bind=engine):
+    """
+    Add `sensor_data.dedup_key` to tables created before it existed.
+
+    `create_all` only creates missing tables, so without this every insert
+    on an older database fails with "Unknown column 'dedup_key'".
+    Returns True if the column was added.
+    """
+    inspector = inspect(bind)
+    if "sensor_data" not in inspector.get_table_names():
+        return False
+    if any(c["name"] == "dedup_key" for c in inspector.get_columns("sensor_data")):
+        return False
+
+    with bind.begin() as conn:
+        conn.execute(text("ALTER TABLE sensor_data ADD COLUMN dedup_key VARCHAR(64) NULL"))
+        conn.execute(text("CREATE UNIQUE INDEX dedup_key ON sensor_data (dedup_key)"))
+    return True
@@ -12,7 +12,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine, Base
+from app.database import engine, Base, ensure_dedup_key_column
 from app.models import SensorData, Alert  # noqa: F401 – ensure models are imported
 from app.routers import sensor_data, alerts, dashboard
 from app.services.mqtt_service import mqtt_subscriber
@@ -31,6 +31,8 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Creating database tables (if not exist)…")
     Base.metadata.create_all(bind=engine)
+    if ensure_dedup_key_column():
+        logger.info("Added sensor_data.dedup_key column")
 
     logger.info("Starting MQTT subscriber…")
     mqtt_subscriber.start()
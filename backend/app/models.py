@@ -19,6 +19,7 @@ class SensorData(Base):
     current = Column(Float, nullable=True)
     pressure = Column(Float, nullable=True)
     raw_payload = Column(Text, nullable=True)
+    dedup_key = Column(String(64), nullable=True, unique=True)  # sha256 hex, see dedup_service
     received_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     def __repr__(self):
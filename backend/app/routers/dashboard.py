@@ -8,8 +8,9 @@ from sqlalchemy import desc
 
 from app.database import get_db
 from app.models import SensorData, Alert
-from app.schemas import DashboardStats
+from app.schemas import DashboardStats, IngestStats
 from app.config import settings
+from app.services.dedup_service import ingest_stats, recent_keys
 
 router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
 
@@ -51,3 +52,9 @@ def get_dashboard(db: Session = Depends(get_db)):
         topics=topic_list,
         thresholds=settings.thresholds,
     )
+
+
+@router.get("/ingest", response_model=IngestStats)
+def get_ingest_stats():
+    """Return MQTT ingest counters, including dropped duplicates (since process start)."""
+    return IngestStats(**ingest_stats.snapshot(), filter_size=len(recent_keys))
@@ -74,3 +74,11 @@ class DashboardStats(BaseModel):
     latest_readings: Dict[str, Any]
     topics: List[str]
     thresholds: Dict[str, Any]
+
+
+class IngestStats(BaseModel):
+    received: int
+    stored: int
+    duplicates_filtered: int    # dropped by the in-process recent-key filter
+    duplicates_db: int          # dropped by the sensor_data.dedup_key constraint
+    filter_size: int
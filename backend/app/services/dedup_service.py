@@ -0,0 +1,148 @@
+"""
+Duplicate-message filtering for MQTT ingestion.
+
+QoS 1 is at-least-once, so the broker may redeliver a message after a
+reconnect. Each message is reduced to a dedup key, and a bounded,
+time-windowed set of recently seen keys rejects redeliveries before any
+DB work. For payloads carrying a device plus a sequence number or
+timestamp, the unique `sensor_data.dedup_key` column is the backstop for
+anything the in-process filter misses (restarts, evicted keys).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+# Payload fields that identify a reading, checked in order of preference
+SEQUENCE_FIELDS = ("seq", "sequence", "msg_id", "message_id")
+TIMESTAMP_FIELDS = ("ts", "timestamp")
+DEVICE_FIELDS = ("device_id", "device")
+
+
+def _message_marker(payload: Dict[str, Any]) -> Optional[Any]:
+    return next(
+        (payload[f] for f in SEQUENCE_FIELDS + TIMESTAMP_FIELDS if payload.get(f) is not None),
+        None,
+    )
+
+
+def _device(payload: Dict[str, Any]) -> Optional[Any]:
+    return next((payload[f] for f in DEVICE_FIELDS if payload.get(f) is not None), None)
+
+
+def has_message_id(payload: Dict[str, Any]) -> bool:
+    """
+    True if the payload carries a sequence number or timestamp.
+
+    Without one the key is a raw-payload hash, which a genuine new reading
+    with identical values also produces, so it only identifies a
+    redelivery when the broker sets the MQTT DUP flag.
+    """
+    return _message_marker(payload) is not None
+
+
+def is_persistent_key(payload: Dict[str, Any]) -> bool:
+    """
+    True if the key is safe to store in the unique `dedup_key` column.
+
+    Requires a device as well as a sequence number or timestamp: two
+    devices on one topic can share a marker (e.g. second-level
+    timestamps), and the column would reject the second reading forever.
+    """
+    return _device(payload) is not None and has_message_id(payload)
+
+
+def build_dedup_key(topic: str, payload: Dict[str, Any], raw_payload: bytes) -> str:
+    """
+    Derive a stable dedup key for one message.
+
+    Uses device/topic plus a sequence number or timestamp from the payload
+    when present; otherwise falls back to hashing the raw payload bytes,
+    which is identical across broker redeliveries.
+    """
+    device = _device(payload) or ""
+    marker = _message_marker(payload)
+
+    h = hashlib.sha256()
+    h.update(topic.encode("utf-8"))
+    h.update(b"\x00")
+    if marker is not None:
+        h.update(f"{device}\x00{marker}".encode("utf-8"))
+    else:
+        h.update(raw_payload)
+    return h.hexdigest()
+
+
+class RecentKeyFilter:
+    """Thread-safe, insertion-ordered set of recent keys, bounded by size and age."""
+
+    def __init__(self, max_size: int, window_seconds: float):
+        self.max_size = max_size
+        self.window_seconds = window_seconds
+        self._keys: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, key: str) -> bool:
+        """Return True if `key` was seen within the window, else record it."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._keys:
+                return True
+            self._keys[key] = now
+            if len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+            return False
+
+    def forget(self, key: str) -> None:
+        """Drop `key` so a failed insert can be retried on redelivery."""
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def _expire(self, now: float) -> None:
+        # Oldest entries sit at the front; stop at the first one still in window
+        cutoff = now - self.window_seconds
+        while self._keys:
+            key, first_seen = next(iter(self._keys.items()))
+            if first_seen >= cutoff:
+                break
+            self._keys.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class IngestCounters:
+    """Thread-safe counters for the ingest pipeline."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.received = 0
+        self.stored = 0
+        self.duplicates_filtered = 0
+        self.duplicates_db = 0
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "received": self.received,
+                "stored": self.stored,
+                "duplicates_filtered": self.duplicates_filtered,
+                "duplicates_db": self.duplicates_db,
+            }
+
+
+# Module-level singletons
+recent_keys = RecentKeyFilter(
+    max_size=settings.DEDUP_CACHE_SIZE,
+    window_seconds=settings.DEDUP_WINDOW_SECONDS,
+)
+ingest_stats = IngestCounters()
@@ -4,8 +4,9 @@ MQTT Subscriber Service.
 Connects to the MQTT broker, subscribes to configured topics,
 and processes each incoming message:
   1. Parse JSON payload
-  2. Store raw data in MySQL
-  3. Validate against thresholds → create alerts
+  2. Drop QoS 1 redeliveries (in-process filter, then DB unique key)
+  3. Store raw data in MySQL
+  4. Validate against thresholds → create alerts
 """
 
 import json
@@ -14,15 +15,26 @@ import threading
 import time
 
 import paho.mqtt.client as mqtt
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.database import SessionLocal
 from app.models import SensorData
+from app.services.dedup_service import (
+    build_dedup_key,
+    has_message_id,
+    ingest_stats,
+    is_persistent_key,
+    recent_keys,
+)
 from app.services.threshold_service import check_thresholds
 
 logger = logging.getLogger("energy.mqtt")
 
+# MySQL ER_DUP_ENTRY – the only IntegrityError treated as a duplicate
+MYSQL_DUPLICATE_ENTRY = 1062
+
 
 class MQTTSubscriber:
     """Manages MQTT connection lifecycle and message handling."""
@@ -57,11 +69,25 @@ class MQTTSubscriber:
         except (json.JSONDecodeError, UnicodeDecodeError) as e:
             logger.error("Invalid payload on %s: %s", topic, e)
             return
+        if not isinstance(payload, dict):
+            logger.error("Invalid payload on %s: expected JSON object, got %s", topic, type(payload).__name__)
+            return
 
         logger.debug("Message on %s: %s", topic, payload)
+        ingest_stats.incr("received")
+
+        # Reject recent redeliveries before touching the database. A raw-payload
+        # key also matches a genuine repeat of the same values, so it only
+        # counts as a duplicate when the broker flags the resend.
+        dedup_key = build_dedup_key(topic, payload, msg.payload)
+        if recent_keys.seen(dedup_key) and (msg.dup or has_message_id(payload)):
+            ingest_stats.incr("duplicates_filtered")
+            logger.debug("Duplicate message on %s filtered (dup=%s)", topic, msg.dup)
+            return
 
         # Persist to database in a fresh session
         db: Session = SessionLocal()
+        stored = False
         try:
             sensor_record = SensorData(
                 topic=topic,
@@ -71,15 +97,34 @@ class MQTTSubscriber:
                 current=payload.get("current"),
                 pressure=payload.get("pressure"),
                 raw_payload=payload_str,
+                # Persist the key only when it identifies one reading from one
+                # device; anything weaker would reject later readings forever
+                dedup_key=dedup_key if is_persistent_key(payload) else None,
             )
             db.add(sensor_record)
-            db.commit()
-
-            # Threshold check
+            try:
+                db.commit()
+            except IntegrityError as e:
+                # Unique dedup_key conflict: a duplicate the filter missed
+                # (restart, evicted key). Any other integrity error is real.
+                if getattr(e.orig, "args", (None,))[:1] != (MYSQL_DUPLICATE_ENTRY,):
+                    raise
+                db.rollback()
+                ingest_stats.incr("duplicates_db")
+                logger.debug("Duplicate message on %s rejected by database", topic)
+                return
+            stored = True
+            ingest_stats.incr("stored")
+
+            # Threshold check – only for newly stored readings, so
+            # redeliveries never raise a second alert
             check_thresholds(topic=topic, payload=payload, db=db)
 
         except Exception:
             db.rollback()
+            if not stored:
+                # Let a redelivery retry the insert
+                recent_keys.forget(dedup_key)
             logger.exception("DB error while processing message on %s", topic)
         finally:
             db.close()
@@ -0,0 +1,247 @@
+"""
+Tests for duplicate-message filtering (no broker or DB required).
+
+Run from backend/:  python -m pytest tests
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import dedup_service
+from app.services.dedup_service import (
+    IngestCounters,
+    RecentKeyFilter,
+    build_dedup_key,
+    has_message_id,
+    is_persistent_key,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(dedup_service.time, "monotonic", fake)
+    return fake
+
+
+# ── build_dedup_key ──────────────────────────────────────────
+
+def test_raw_fallback_matches_identical_payload():
+    raw = b'{"temperature": 25.0}'
+    assert build_dedup_key("sensor/a", {"temperature": 25.0}, raw) == \
+        build_dedup_key("sensor/a", {"temperature": 25.0}, raw)
+
+
+def test_raw_fallback_differs_by_payload_and_topic():
+    key = build_dedup_key("sensor/a", {}, b'{"temperature": 25.0}')
+    assert key != build_dedup_key("sensor/a", {}, b'{"temperature": 25.1}')
+    assert key != build_dedup_key("sensor/b", {}, b'{"temperature": 25.0}')
+
+
+def test_sequence_number_ignores_raw_payload():
+    a = build_dedup_key("sensor/a", {"seq": 7, "temperature": 1}, b"one")
+    b = build_dedup_key("sensor/a", {"seq": 7, "temperature": 2}, b"two")
+    assert a == b
+    assert a != build_dedup_key("sensor/a", {"seq": 8}, b"one")
+
+
+def test_sequence_takes_precedence_over_timestamp():
+    a = build_dedup_key("sensor/a", {"seq": 7, "ts": 100}, b"")
+    b = build_dedup_key("sensor/a", {"seq": 7, "ts": 200}, b"")
+    assert a == b
+
+
+def test_timestamp_used_without_sequence():
+    a = build_dedup_key("sensor/a", {"ts": 100}, b"one")
+    assert a == build_dedup_key("sensor/a", {"ts": 100}, b"two")
+    assert a != build_dedup_key("sensor/a", {"ts": 101}, b"one")
+
+
+def test_device_distinguishes_same_sequence():
+    a = build_dedup_key("sensor/a", {"device_id": "d1", "seq": 7}, b"")
+    b = build_dedup_key("sensor/a", {"device_id": "d2", "seq": 7}, b"")
+    assert a != b
+
+
+def test_has_message_id():
+    assert has_message_id({"seq": 0})
+    assert has_message_id({"timestamp": "2026-01-01T00:00:00Z"})
+    assert not has_message_id({"temperature": 25.0, "device_id": "d1"})
+    assert not has_message_id({"seq": None})
+
+
+def test_persistent_key_requires_device_and_marker():
+    assert is_persistent_key({"device_id": "d1", "seq": 7})
+    assert is_persistent_key({"device": "d1", "ts": 100})
+    assert not is_persistent_key({"ts": 100})
+    assert not is_persistent_key({"seq": 7})
+    assert not is_persistent_key({"device_id": "d1", "temperature": 25.0})
+
+
+def test_devices_sharing_timestamp_get_distinct_persistent_keys():
+    a = {"device_id": "d1", "ts": 100}
+    b = {"device_id": "d2", "ts": 100}
+    assert is_persistent_key(a) and is_persistent_key(b)
+    assert build_dedup_key("sensor/a", a, b"") != build_dedup_key("sensor/a", b, b"")
+
+
+# ── RecentKeyFilter ──────────────────────────────────────────
+
+def test_filter_rejects_repeat(clock):
+    f = RecentKeyFilter(max_size=10, window_seconds=60)
+    assert f.seen("a") is False
+    assert f.seen("a") is True
+    assert f.seen("b") is False
+
+
+def test_filter_expires_after_window(clock):
+    f = RecentKeyFilter(max_size=10, window_seconds=60)
+    f.seen("a")
+    clock.now += 30
+    f.seen("b")
+    clock.now += 31
+    assert f.seen("a") is False     # expired, recorded again
+    assert f.seen("b") is True      # still within window
+    clock.now += 61
+    f.seen("c")
+    assert len(f) == 1
+
+
+def test_filter_evicts_oldest_over_capacity(clock):
+    f = RecentKeyFilter(max_size=2, window_seconds=60)
+    f.seen("a")
+    f.seen("b")
+    f.seen("c")
+    assert len(f) == 2
+    assert f.seen("b") is True
+    assert f.seen("c") is True
+    assert f.seen("a") is False
+
+
+def test_filter_forget_allows_retry(clock):
+    f = RecentKeyFilter(max_size=10, window_seconds=60)
+    f.seen("a")
+    f.forget("a")
+    f.forget("missing")
+    assert f.seen("a") is False
+
+
+# ── IngestCounters ───────────────────────────────────────────
+
+def test_counters_snapshot():
+    counters = IngestCounters()
+    counters.incr("received")
+    counters.incr("received")
+    counters.incr("duplicates_filtered")
+    assert counters.snapshot() == {
+        "received": 2,
+        "stored": 0,
+        "duplicates_filtered": 1,
+        "duplicates_db": 0,
+    }
+
+
+# ── MQTTSubscriber._on_message ───────────────────────────────
+
+class FakeSession:
+    def __init__(self, store):
+        self.store = store
+
+    def add(self, record):
+        self.store.append(record)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def subscriber(monkeypatch):
+    from app.services import mqtt_service
+
+    stored = []
+    monkeypatch.setattr(mqtt_service, "SessionLocal", lambda: FakeSession(stored))
+    monkeypatch.setattr(mqtt_service, "check_thresholds", lambda **kwargs: None)
+    monkeypatch.setattr(mqtt_service, "recent_keys", RecentKeyFilter(max_size=10, window_seconds=60))
+
+    def deliver(raw, dup=False, topic="sensor/a"):
+        msg = SimpleNamespace(topic=topic, payload=raw, dup=dup)
+        mqtt_service.mqtt_subscriber._on_message(None, None, msg)
+
+    deliver.stored = stored
+    return deliver
+
+
+@pytest.mark.parametrize("raw", [b"42", b"[1, 2]", b'"x"', b"null"])
+def test_non_object_payload_rejected_before_db(subscriber, raw):
+    subscriber(raw)
+    assert subscriber.stored == []
+
+
+def test_repeated_identical_payload_without_dup_is_stored(subscriber):
+    raw = b'{"temperature": 25.0}'
+    subscriber(raw)
+    subscriber(raw)
+    assert len(subscriber.stored) == 2
+    assert all(r.dedup_key is None for r in subscriber.stored)
+
+
+def test_flagged_redelivery_of_raw_payload_is_dropped(subscriber):
+    raw = b'{"temperature": 25.0}'
+    subscriber(raw)
+    subscriber(raw, dup=True)
+    assert len(subscriber.stored) == 1
+
+
+def test_repeated_sequence_number_is_dropped_without_dup(subscriber):
+    raw = b'{"device_id": "d1", "seq": 7, "temperature": 25.0}'
+    subscriber(raw)
+    subscriber(raw)
+    assert len(subscriber.stored) == 1
+    assert subscriber.stored[0].dedup_key is not None
+
+
+# ── ensure_dedup_key_column ──────────────────────────────────
+
+def test_dedup_key_column_added_to_existing_table():
+    from sqlalchemy import create_engine, inspect, text
+    from sqlalchemy.exc import IntegrityError
+    from app.database import ensure_dedup_key_column
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE sensor_data (id INTEGER PRIMARY KEY, topic VARCHAR(255))"))
+
+    assert ensure_dedup_key_column(engine) is True
+    assert ensure_dedup_key_column(engine) is False
+    assert "dedup_key" in {c["name"] for c in inspect(engine).get_columns("sensor_data")}
+
+    insert = text("INSERT INTO sensor_data (topic, dedup_key) VALUES ('t', :k)")
+    with engine.begin() as conn:
+        conn.execute(insert, {"k": None})
+        conn.execute(insert, {"k": None})
+        conn.execute(insert, {"k": "abc"})
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(insert, {"k": "abc"})
+
+
+def test_dedup_key_column_skipped_without_table():
+    from sqlalchemy import create_engine
+    from app.database import ensure_dedup_key_column
+
+    assert ensure_dedup_key_column(create_engine("sqlite://")) is False